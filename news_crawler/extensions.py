@@ -0,0 +1,137 @@
+# Define here the extensions of the project
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/extensions.html
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from .middlewares import request_dead_lettered
+import json
+import logging
+import queue
+import random
+import threading
+import time
+
+# 写线程每批最多写入的事件数，以及无新事件时的最长刷新间隔（秒）
+EVENT_LOG_BATCH_SIZE = 1000
+EVENT_LOG_FLUSH_INTERVAL = 1.0
+# 逐请求、逐新闻输出 DEBUG 文本日志的 logger，事件日志已记录这些信息
+PER_REQUEST_LOGGERS = ('scrapy.core.engine', 'scrapy.core.scraper')
+
+class EventLogExtension:
+    """
+    结构化事件日志：将爬取事件以紧凑的 JSON Lines 记录写入 EVENT_LOG_FILE。
+
+    每条记录包含时间 t、事件类型 e 及事件字段；按 EVENT_LOG_SAMPLE_RATES 对每种事件
+    采样，采样率小于 1 的记录带有权重 w（采样率的倒数）。被采样丢弃的事件不会被格式化，
+    保留的事件以原始数据入队，由后台线程批量序列化并写入，不阻塞爬取。
+    事件类型：response、item、drop、error、dead_letter。
+    可用 python -m news_crawler.utils.event_analysis 分析生成的日志。
+    EVENT_LOG_QUIET 为真（默认）时，将逐请求、逐新闻的文本日志提升到 INFO 级别以上。
+    """
+
+    def __init__(self, path, sample_rates, quiet=True):
+        self.path = path
+        self.sample_rates = sample_rates
+        self.quiet = quiet
+        self.queue = queue.SimpleQueue()
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get('EVENT_LOG_FILE')
+        if not path:
+            raise NotConfigured
+        sample_rates = {e: float(r) for e, r in crawler.settings.getdict('EVENT_LOG_SAMPLE_RATES').items()}
+        ext = cls(path, sample_rates, crawler.settings.getbool('EVENT_LOG_QUIET', True))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(ext.spider_error, signal=signals.spider_error)
+        crawler.signals.connect(ext.request_dead_lettered, signal=request_dead_lettered)
+        return ext
+
+    def spider_opened(self, spider):
+        if self.quiet:
+            for name in PER_REQUEST_LOGGERS + (spider.name,):
+                logger = logging.getLogger(name)
+                if logger.getEffectiveLevel() < logging.INFO:
+                    logger.setLevel(logging.INFO)
+        # 在主线程中打开文件，路径或权限错误直接报告给爬虫，而不是让写线程静默退出
+        f = open(self.path, 'a', encoding='utf-8')
+        self.writer = threading.Thread(target=self._write_loop, args=(f,), name='event-log-writer', daemon=True)
+        self.writer.start()
+
+    def spider_closed(self, spider):
+        if self.writer is None:
+            return
+        self.queue.put(None)
+        self.writer.join()
+
+    def response_received(self, response, request, spider):
+        self._emit('response', url=response.url, status=response.status,
+                   latency=request.meta.get('download_latency'))
+
+    def item_scraped(self, item, response, spider):
+        if item is None:
+            return
+        self._emit('item', url=item.get('url'))
+
+    def item_dropped(self, item, response, exception, spider):
+        self._emit('drop', url=item.get('url'), reason=exception)
+
+    def spider_error(self, failure, response, spider):
+        self._emit('error', url=response.url, error=failure.type)
+
+    def request_dead_lettered(self, request, reason, spider):
+        self._emit('dead_letter', url=request.url, reason=reason)
+
+    def _emit(self, event, **fields):
+        if self.writer is None:
+            return
+        rate = self.sample_rates.get(event, 1.0)
+        if rate < 1.0:
+            if random.random() >= rate:
+                return
+            fields['w'] = 1 / rate
+        # 只入队原始数据，格式化在写线程中进行
+        self.queue.put((time.time(), event, fields))
+
+    def _write_loop(self, f):
+        with f:
+            done = False
+            while not done:
+                batch = []
+                try:
+                    record = self.queue.get(timeout=EVENT_LOG_FLUSH_INTERVAL)
+                    while record is not None:
+                        batch.append(record)
+                        if len(batch) >= EVENT_LOG_BATCH_SIZE:
+                            break
+                        record = self.queue.get_nowait()
+                    else:
+                        done = True  # 收到关闭标记
+                except queue.Empty:
+                    pass
+                if batch:
+                    f.write(''.join(self._format(*record) for record in batch))
+                    f.flush()
+
+    @staticmethod
+    def _format(t, event, fields):
+        record = {'t': round(t, 3), 'e': event}
+        for key, value in fields.items():
+            if value is None:
+                continue
+            if isinstance(value, type):
+                value = value.__name__
+            elif isinstance(value, Exception):
+                value = str(value)
+            elif isinstance(value, float):
+                value = round(value, 3)
+            record[key] = value
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
@@ -4,10 +4,24 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 from scrapy import signals
+from scrapy.exceptions import DontCloseSpider, IgnoreRequest
+from scrapy.utils.misc import load_object
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
 
+from datetime import datetime
+from urllib.parse import urlparse
+import json
+import os
+import time
+
+# 写入死信队列、可用于重放的请求 meta 字段
+DEAD_LETTER_META_KEYS = ('item', 'keyword', 'page')
+
+# 请求写入死信队列时发送的信号，参数为 request、reason、spider
+request_dead_lettered = object()
+
 
 class NewsCrawlerSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -101,3 +115,226 @@ class NewsCrawlerDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class CircuitBreakerMiddleware:
+    """
+    按端点熔断失败请求，并将最终失败的请求写入磁盘上的死信队列。
+
+    端点连续失败 CIRCUIT_BREAKER_THRESHOLD 次后熔断，熔断时长按指数退避增长；熔断期间的
+    请求不下载、不占用并发槽位，而是推迟到熔断到期后重新入队。到期后进入半开状态，仅放行
+    一个探测请求，探测成功则恢复，失败则重新熔断。
+    重试耗尽、不可重试，或被推迟超过 CIRCUIT_BREAKER_MAX_DEFERRALS 次的请求连同失败原因
+    追加到 DEAD_LETTER_FILE，可通过爬虫参数 replay 在之后的爬取中重新注入。
+    """
+
+    def __init__(self, crawler, dead_letter_file, threshold, base_delay, max_delay, max_deferrals,
+                 failure_codes, retry_http_codes, retry_exceptions, max_retry_times):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.dead_letter_file = dead_letter_file
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_deferrals = max_deferrals
+        self.failure_codes = set(failure_codes)
+        # 与 RetryMiddleware 的判断保持一致，用于确定失败是否为最终失败
+        self.retry_http_codes = set(retry_http_codes)
+        self.retry_exceptions = retry_exceptions
+        self.max_retry_times = max_retry_times
+        # endpoint -> {'failures', 'trips', 'open_until', 'probing', 'probe_deadline'}
+        self.circuits = {}
+        # 等待熔断到期后重新入队的请求的定时器
+        self.deferred_calls = set()
+        self.dead_letters = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        dead_letter_file = settings.get('DEAD_LETTER_FILE') or os.path.join(
+            settings.get('OUTPUT_DIR', '../data'), 'dead_letter.jsonl')
+        failure_codes = settings.getlist('CIRCUIT_BREAKER_FAILURE_CODES') or \
+            settings.getlist('RETRY_HTTP_CODES')
+        if settings.getbool('RETRY_ENABLED'):
+            retry_http_codes = [int(code) for code in settings.getlist('RETRY_HTTP_CODES')]
+            retry_exceptions = tuple(load_object(e) if isinstance(e, str) else e
+                                     for e in settings.getlist('RETRY_EXCEPTIONS'))
+        else:
+            retry_http_codes, retry_exceptions = [], ()
+        s = cls(
+            crawler,
+            dead_letter_file,
+            settings.getint('CIRCUIT_BREAKER_THRESHOLD', 5),
+            settings.getfloat('CIRCUIT_BREAKER_BASE_DELAY', 10),
+            settings.getfloat('CIRCUIT_BREAKER_MAX_DELAY', 600),
+            settings.getint('CIRCUIT_BREAKER_MAX_DEFERRALS', 3),
+            [int(code) for code in failure_codes],
+            retry_http_codes,
+            retry_exceptions,
+            settings.getint('RETRY_TIMES'),
+        )
+        crawler.signals.connect(s.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_request(self, request, spider):
+        endpoint = self._endpoint(request)
+        circuit = self.circuits.get(endpoint)
+        if circuit is None or circuit['open_until'] is None:
+            return None
+
+        now = time.monotonic()
+        if now >= circuit['open_until'] and (not circuit['probing'] or now >= circuit['probe_deadline']):
+            # 半开状态：放行一个探测请求，探测请求丢失时超时后重新探测
+            circuit['probing'] = True
+            circuit['probe_deadline'] = now + self.max_delay
+            request.meta['circuit_probe'] = True
+            self.stats.inc_value('circuit_breaker/probes', spider=spider)
+            return None
+
+        deferrals = request.meta.get('circuit_deferrals', 0)
+        if deferrals >= self.max_deferrals:
+            self._dead_letter(request, 'circuit_open', spider)
+            raise IgnoreRequest(f'Circuit open for {endpoint}')
+
+        # 推迟到熔断到期（探测进行中则再等一个基础时长）后重新入队
+        delay = max(circuit['open_until'] - now, 0) or self.base_delay
+        meta = {k: v for k, v in request.meta.items() if k != 'circuit_probe'}
+        meta['circuit_deferrals'] = deferrals + 1
+        self._defer(request.replace(meta=meta, dont_filter=True), delay)
+        self.stats.inc_value('circuit_breaker/deferred', spider=spider)
+        raise IgnoreRequest(f'Circuit open for {endpoint}, deferred {delay:.0f}s')
+
+    def process_response(self, request, response, spider):
+        if response.status in self.failure_codes:
+            self._record_failure(request, spider)
+        else:
+            self._record_success(request, spider)
+        if response.status >= 400 and self._is_final(request, response.status in self.retry_http_codes):
+            self._dead_letter(request, f'http_{response.status}', spider)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if isinstance(exception, IgnoreRequest):
+            return None
+        self._record_failure(request, spider)
+        if self._is_final(request, isinstance(exception, self.retry_exceptions)):
+            self._dead_letter(request, type(exception).__name__, spider)
+        return None
+
+    def spider_idle(self, spider):
+        # 仍有推迟的请求时不关闭爬虫
+        if self.deferred_calls:
+            raise DontCloseSpider
+
+    def spider_closed(self, spider):
+        for call in self.deferred_calls:
+            call.cancel()
+        self.deferred_calls.clear()
+        if self.dead_letters is not None:
+            self.dead_letters.close()
+
+    @staticmethod
+    def _endpoint(request):
+        # 接口（如 getNews）按路径区分，文章页按域名区分
+        parsed = urlparse(request.url)
+        if parsed.path.endswith(('.html', '.htm', '.shtml')):
+            return parsed.netloc
+        return parsed.netloc + parsed.path
+
+    def _defer(self, request, delay):
+        from twisted.internet import reactor
+
+        def resubmit():
+            self.deferred_calls.discard(call)
+            self.crawler.engine.crawl(request)
+
+        call = reactor.callLater(delay, resubmit)
+        self.deferred_calls.add(call)
+
+    def _is_final(self, request, retryable):
+        if not retryable or request.meta.get('dont_retry', False):
+            return True
+        max_retry_times = request.meta.get('max_retry_times', self.max_retry_times)
+        return request.meta.get('retry_times', 0) >= max_retry_times
+
+    def _record_success(self, request, spider):
+        # 重试副本会复制 meta，探测标记只对本次结果有效
+        request.meta.pop('circuit_probe', None)
+        circuit = self.circuits.pop(self._endpoint(request), None)
+        if circuit and circuit['open_until'] is not None:
+            self.stats.inc_value('circuit_breaker/closed', spider=spider)
+
+    def _record_failure(self, request, spider):
+        probe = request.meta.pop('circuit_probe', False)
+        endpoint = self._endpoint(request)
+        circuit = self.circuits.setdefault(
+            endpoint, {'failures': 0, 'trips': 0, 'open_until': None, 'probing': False, 'probe_deadline': 0})
+        circuit['failures'] += 1
+        if probe or circuit['failures'] >= self.threshold:
+            if circuit['open_until'] is not None and not probe:
+                return  # 已熔断，等待探测结果
+            circuit['trips'] += 1
+            delay = min(self.base_delay * 2 ** (circuit['trips'] - 1), self.max_delay)
+            circuit['open_until'] = time.monotonic() + delay
+            circuit['probing'] = False
+            self.stats.inc_value('circuit_breaker/opened', spider=spider)
+            spider.logger.warning("Circuit opened for %s for %.0fs", endpoint, delay)
+
+    def _dead_letter(self, request, reason, spider):
+        if self.dead_letters is None:
+            os.makedirs(os.path.dirname(self.dead_letter_file) or '.', exist_ok=True)
+            self.dead_letters = open(self.dead_letter_file, 'a', encoding='utf-8')
+        meta = {}
+        for key in DEAD_LETTER_META_KEYS:
+            if key in request.meta:
+                value = request.meta[key]
+                meta[key] = ItemAdapter(value).asdict() if is_item(value) else value
+        record = {
+            'url': request.url,
+            'callback': getattr(request.callback, '__name__', None),
+            'priority': request.priority,
+            'meta': meta,
+            'reason': reason,
+            'endpoint': self._endpoint(request),
+            'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        self.dead_letters.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.dead_letters.flush()
+        self.stats.inc_value('dead_letter/count', spider=spider)
+        self.stats.inc_value(f'dead_letter/reason/{reason}', spider=spider)
+        self.crawler.signals.send_catch_log(request_dead_lettered, request=request, reason=reason, spider=spider)
+
+
+class FreshnessMiddleware:
+    """
+    新鲜度优先调度（-a schedule=freshness）下，在请求出队下载时按当时的时延再次检查 sla。
+
+    入队时尚未过期、但因爬虫积压而在等待中过期的新闻：sla_policy 为 drop 时丢弃，
+    为 deprioritize 时以最低优先级重新入队一次。
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    def process_request(self, request, spider):
+        if getattr(spider, 'schedule', None) != 'freshness' or not spider.sla:
+            return None
+        item = request.meta.get('item')
+        if item is None or request.meta.get('sla_deprioritized'):
+            return None
+        age = spider.news_age(item)
+        if age is None or age <= spider.sla:
+            return None
+
+        if spider.sla_policy == 'drop':
+            self.stats.inc_value('freshness/sla_dropped', spider=spider)
+            raise IgnoreRequest(f'Stale news: {request.url}')
+        self.stats.inc_value('freshness/sla_deprioritized', spider=spider)
+        # 返回新请求会重新进入调度器，需跳过去重
+        return request.replace(priority=spider.stale_priority, dont_filter=True,
+                               meta={**request.meta, 'sla_deprioritized': True})
@@ -1,17 +1,24 @@
 # File: xinhua-crawler/news_crawler/pipelines.py
 
 from .utils.cleaning import clean_cn, clean_en
+from scrapy.exceptions import DropItem
 import json
 import os
 
 class NewsPipeline:
-    def __init__(self, output_dir, language, keep_punc):
+    def __init__(self, output_dir, language, keep_punc, metadata_only=False):
         self.output_dir = output_dir
         self.language = language
         self.keep_punc = keep_punc
+        self.metadata_only = metadata_only
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
         
+        if self.metadata_only:
+            # 仅元数据模式：逐行写入，不清洗、不在内存中保留新闻列表
+            self.metadata = open(os.path.join(self.output_dir, 'metadata.jsonl'), 'w', encoding='utf-8')
+            return
+        
         self.cache = open(os.path.join(self.output_dir, 'data_cache.jsonl'), 'w', encoding='utf-8')
         self.file = open(os.path.join(self.output_dir, 'data.json'), 'w', encoding='utf-8')
         self.news_list = []
@@ -23,9 +30,14 @@ class NewsPipeline:
         language = crawler.spider.language
         keep_punc = crawler.settings.get('KEEP_PUNC', 'true')
         keep_punc = keep_punc.lower() == 'true'
-        return cls(output_dir, language, keep_punc)
+        metadata_only = bool(crawler.spider.metadata_only)
+        return cls(output_dir, language, keep_punc, metadata_only)
 
     def process_item(self, item, spider):
+        if self.metadata_only:
+            self.metadata.write(json.dumps(dict(item), ensure_ascii=False) + '\n')
+            return item
+        
         # 直接使用 self.language 来选择清洗函数
         content = item.get('content', '')
         if self.language == 'cn':
@@ -43,11 +55,14 @@ class NewsPipeline:
             self.cache.write(json.dumps(dict(item), ensure_ascii=False, indent=4) + '\n')
             return item
         else:
-            # 如果内容为空，则忽略该 item
-            spider.logger.warning(f'Empty content for {item["url"]}')
-            return None
+            # 如果内容为空，则丢弃该 item；原因中不含 URL，便于按原因汇总（URL 由事件单独记录）
+            raise DropItem('Empty content')
 
     def close_spider(self, spider):
+        if self.metadata_only:
+            self.metadata.close()
+            return
+        
         # 在关闭爬虫时，将新闻列表保存到最终文件
         json.dump(self.news_list, self.file, ensure_ascii=False, indent=4)
         # 删除缓存文件
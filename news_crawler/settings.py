@@ -50,15 +50,23 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 16
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "news_crawler.middlewares.NewsCrawlerDownloaderMiddleware": 543,
-#}
+# 熔断中间件需位于 RetryMiddleware (550) 之后，以便观察每次重试的结果
+DOWNLOADER_MIDDLEWARES = {
+   "news_crawler.middlewares.FreshnessMiddleware": 50,
+   "news_crawler.middlewares.CircuitBreakerMiddleware": 560,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+   "news_crawler.extensions.EventLogExtension": 500,
+}
+
+# 结构化事件日志，设置 EVENT_LOG_FILE 后启用；启用时默认不再输出逐请求、逐新闻的 DEBUG 文本日志
+# （EVENT_LOG_QUIET = False 可保留）
+#EVENT_LOG_FILE = "../data/events.jsonl"
+# 各事件类型的采样率，未列出的类型全部记录
+#EVENT_LOG_SAMPLE_RATES = {"response": 0.1, "item": 1.0}
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
@@ -105,5 +113,27 @@ RETRY_ENABLED = True
 RETRY_TIMES = 2
 RETRY_HTTP_CODES = [500, 502, 503, 504, 408]
 
+# 设置熔断：端点连续失败次数阈值，熔断时长（秒）按指数退避增长
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_BASE_DELAY = 10
+CIRCUIT_BREAKER_MAX_DELAY = 600
+# 熔断期间的请求推迟到熔断到期后重试，推迟超过该次数后写入死信队列
+CIRCUIT_BREAKER_MAX_DEFERRALS = 3
+# 计为端点失败的状态码，默认与 RETRY_HTTP_CODES 相同
+#CIRCUIT_BREAKER_FAILURE_CODES = [500, 502, 503, 504, 408, 429]
+# 死信队列文件，默认为 OUTPUT_DIR/dead_letter.jsonl
+#DEAD_LETTER_FILE = "../data/dead_letter.jsonl"
+
+# 同一优先级内的请求按先进先出调度（Scrapy 默认为后进先出），
+# 使 fifo 调度及新鲜度优先调度中同一新鲜度桶内的排序真正生效
+SCHEDULER_MEMORY_QUEUE = "scrapy.squeues.FifoMemoryQueue"
+SCHEDULER_DISK_QUEUE = "scrapy.squeues.PickleFifoDiskQueue"
+
 # 设置终止条件
-CLOSESPIDER_ITEMCOUNT = 1000
\ No newline at end of file
+CLOSESPIDER_ITEMCOUNT = 1000
+
+# 列表发现模式（-a discovery=listing）使用的栏目/列表页，含 {date} 的模板按日期范围逐日展开
+#LISTING_URLS = [
+#    "https://www.news.cn/politics/",
+#    "https://www.news.cn/politics/{date:%Y%m%d}/index.html",
+#]
@@ -2,7 +2,10 @@ import scrapy
 from scrapy import Request
 from ..items import NewsItem
 from bs4 import BeautifulSoup
+from datetime import datetime, timedelta, timezone
 import json
+import math
+import os
 import random
 import re
 import jieba
@@ -17,6 +20,66 @@ DEFAULT_MAX_PAGES = 50
 DEFAULT_NEWS_BATCH_SIZE = 100
 DEFAULT_ONLY_TITLE = 0
 DEFAULT_BY_RELATIVITY = 1
+DEFAULT_SCHEDULE = 'fifo'
+DEFAULT_SLA = 0
+DEFAULT_SLA_POLICY = 'deprioritize'
+DEFAULT_DISCOVERY = 'search'
+DEFAULT_METADATA_ONLY = 0
+
+DATE_PATTERN = '%Y%m%d'
+# 新闻链接形如 /YYYYMMDD/<id>/c.html
+ARTICLE_URL_PATTERN = re.compile(r'(?:https?:)?//[\w.]*news\.cn(?:/[\w-]+)*/(\d{8})/([0-9a-zA-Z]+)/c\.html')
+# 新闻页中的发布时间，如 '2024-09-18 10:29:31' 或 '2024 09/18 10:29:31'
+PUBTIME_PATTERN = re.compile(
+    r'(\d{4})\s*[-/年\s]\s*(\d{1,2})\s*[-/月]\s*(\d{1,2})\s*日?\s*(\d{1,2}):(\d{2})(?::(\d{2}))?')
+# 列表页“下一页”链接的文字
+NEXT_PAGE_TEXTS = ('下一页', '下页', 'Next', 'Next Page', '>', '»')
+# 默认的栏目/列表页，可用 LISTING_URLS 设置覆盖；含 {date} 的模板按日期范围逐日展开，
+# 例如 'https://www.news.cn/politics/{date:%Y%m%d}/index.html'
+DEFAULT_LISTING_URLS = {
+    'cn': [
+        'https://www.news.cn/',
+        'https://www.news.cn/politics/',
+        'https://www.news.cn/world/',
+        'https://www.news.cn/fortune/',
+        'https://www.news.cn/tech/',
+        'https://www.news.cn/local/',
+        'https://www.news.cn/culture/',
+        'https://www.news.cn/sports/',
+    ],
+    'en': [
+        'https://english.news.cn/',
+        'https://english.news.cn/china/',
+        'https://english.news.cn/world/',
+        'https://english.news.cn/business/',
+        'https://english.news.cn/sci-tech/',
+    ],
+}
+
+# 新华网 pubtime 为北京时间
+CN_TZ = timezone(timedelta(hours=8))
+# 新鲜度优先调度：按小时分桶，超过 FRESHNESS_BUCKETS 小时的新闻不再区分新鲜度
+FRESHNESS_BUCKET = 3600
+FRESHNESS_BUCKETS = 24
+# 同一新鲜度桶内按搜索排名分档，每档 RANK_TIER_SIZE 名；优先级总数保持在百级，
+# 避免调度器（及 JOBDIR 磁盘队列）为每个优先级单独建队列
+RANK_TIERS = 4
+RANK_TIER_SIZE = 25
+LATENCY_PERCENTILES = (50, 90, 99)
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    计算已排序数值列表的百分位数（最近秩法）。
+    
+    Args:
+        values (list[float]): 已升序排序的数值列表。
+        q (float): 百分位（0-100）。
+        
+    Returns:
+        float: 对应的百分位数。
+    """
+    index = max(math.ceil(q / 100 * len(values)) - 1, 0)
+    return values[index]
 
 class NewsSpider(scrapy.Spider):
     """
@@ -30,19 +93,54 @@ class NewsSpider(scrapy.Spider):
         news_batch_size (int): 每批处理的新闻数量。
         only_title (int): 是否仅搜索标题。
         by_relativity (int): 是否按相关性排序。
+        schedule (str): 新闻请求调度方式（'fifo' 或 'freshness'）。
+        sla (int): 发布到抓取的时延目标（秒），0 表示不限制。
+        sla_policy (str): 超过 sla 的新闻的处理方式（'drop' 或 'deprioritize'）。
+        replay (str): 需要重新注入的死信队列文件路径，为空则不重放。
+        discovery (str): 新闻发现方式（'search'、'listing' 或 'both'）。
+        start_date (datetime): 列表发现的起始日期（参数格式 YYYYMMDD）。
+        end_date (datetime): 列表发现的结束日期（含），默认为当天。
+        metadata_only (int): 是否只输出搜索结果中的元数据，不下载新闻正文。
+        fetch (str): 需要补抓正文的元数据文件（JSON Lines）路径，指定时只抓取其中的新闻。
         visited_urls (set): 已访问的 URL 集合。
         news_queue (list): 新闻队列。
+        batch_count (int): 上次更换关键词以来从搜索结果中收集的新闻数量。
+        ingest_latencies (list): 已抓取新闻的发布到抓取时延（秒）。
     方法:
-        __init__(self, start_keyword, language, max_pages, news_batch_size, only_title, by_relativity, *args, **kwargs):
+        __init__(self, start_keyword, language, max_pages, news_batch_size, only_title, by_relativity,
+                 schedule, sla, sla_policy, replay, discovery, start_date, end_date, metadata_only, fetch,
+                 *args, **kwargs):
             初始化 NewsSpider 实例。
         start_requests(self):
-            开始爬取请求，使用初始关键词。
+            开始爬取请求，使用初始关键词和/或栏目列表页。
+        listing_requests(self):
+            按日期范围展开栏目列表页，生成列表请求。
+        parse_listing(self, response):
+            解析栏目列表页，直接提取日期范围内的新闻链接并加入队列，并跟随分页（最多 max_pages 页）。
+        replay_dead_letters(self, path):
+            从死信队列文件重建请求，重新注入本次爬取。
+        fetch_bodies(self, path):
+            为元数据文件中选定的新闻生成正文请求。
         search(self, page, keyword):
             根据关键词和页码生成搜索请求。
         parse_search(self, response):
             解析搜索结果页面，提取新闻信息并加入队列。
         process_news_queue(self):
-            处理新闻队列中的新闻，生成新闻详情请求。
+            处理新闻队列中的新闻，生成新闻详情请求；仅元数据模式下直接输出新闻。
+        closed(self, reason):
+            爬虫关闭时记录发布到抓取时延的百分位数和每个请求发现的新闻数。
+        _url_key(url):
+            静态方法，返回用于去重的新闻链接标识。
+        stale_priority(self):
+            属性，超过 sla 的新闻请求使用的优先级。
+        news_age(self, item):
+            计算新闻自发布以来经过的秒数。
+        _freshness_priority(self, age, rank):
+            根据新闻时效和搜索排名计算请求优先级。
+        _record_latency(self, item):
+            记录新闻的发布到抓取时延。
+        _extract_pubtime(self, soup, url):
+            从新闻详情页面提取发布时间。
         _parse_news_cn(self, response):
             解析中文新闻详情页面，提取新闻内容。
         _parse_news_en(self, response):
@@ -60,7 +158,10 @@ class NewsSpider(scrapy.Spider):
     
     def __init__(self, start_keyword='1', language=DEFAULT_LANGUAGE, max_pages=DEFAULT_MAX_PAGES,
                  news_batch_size=DEFAULT_NEWS_BATCH_SIZE, only_title=DEFAULT_ONLY_TITLE,
-                 by_relativity=DEFAULT_BY_RELATIVITY, *args, **kwargs):
+                 by_relativity=DEFAULT_BY_RELATIVITY, schedule=DEFAULT_SCHEDULE, sla=DEFAULT_SLA,
+                 sla_policy=DEFAULT_SLA_POLICY, replay=None, discovery=DEFAULT_DISCOVERY,
+                 start_date=None, end_date=None, metadata_only=DEFAULT_METADATA_ONLY, fetch=None,
+                 *args, **kwargs):
         super(NewsSpider, self).__init__(*args, **kwargs)
         
         # 初始化参数
@@ -70,6 +171,27 @@ class NewsSpider(scrapy.Spider):
         self.news_batch_size = int(news_batch_size)
         self.only_title = int(only_title)
         self.by_relativity = int(by_relativity)
+        self.schedule = schedule
+        self.sla = int(sla)
+        self.sla_policy = sla_policy
+        self.replay = replay
+        self.discovery = discovery
+        self.end_date = datetime.strptime(end_date, DATE_PATTERN) if end_date else \
+            datetime.now(CN_TZ).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        self.start_date = datetime.strptime(start_date, DATE_PATTERN) if start_date else self.end_date
+        self.metadata_only = int(metadata_only)
+        self.fetch = fetch
+        
+        if self.metadata_only and self.fetch:
+            raise ValueError("metadata_only and fetch cannot be used together")
+        if self.discovery not in ('search', 'listing', 'both'):
+            raise ValueError(f"Unsupported discovery: {self.discovery}")
+        if self.start_date > self.end_date:
+            raise ValueError(f"start_date {start_date} is after end_date {end_date}")
+        if self.schedule not in ('fifo', 'freshness'):
+            raise ValueError(f"Unsupported schedule: {self.schedule}")
+        if self.sla_policy not in ('drop', 'deprioritize'):
+            raise ValueError(f"Unsupported sla_policy: {self.sla_policy}")
         
         if self.language == 'cn':
             self.parse_news = self._parse_news_cn
@@ -82,12 +204,77 @@ class NewsSpider(scrapy.Spider):
 
         self.visited_urls = set()
         self.news_queue = []
+        self.batch_count = 0
+        self.ingest_latencies = []
 
     def start_requests(self):
-        # 使用初始关键词 '1' 开始爬取
-        keyword = self.start_keyword
-        for page in range(1, self.max_pages+1):
-            yield from self.search(page, keyword)
+        if self.replay:
+            yield from self.replay_dead_letters(self.replay)
+        if self.fetch:
+            # 补抓模式只抓取选定新闻的正文
+            yield from self.fetch_bodies(self.fetch)
+            return
+        if self.discovery in ('listing', 'both'):
+            yield from self.listing_requests()
+        if self.discovery in ('search', 'both'):
+            # 使用初始关键词 '1' 开始爬取
+            keyword = self.start_keyword
+            for page in range(1, self.max_pages+1):
+                yield from self.search(page, keyword)
+    
+    def fetch_bodies(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        self.logger.info("Fetching bodies for %d news from %s", len(records), path)
+        for rank, record in enumerate(records):
+            key = self._url_key(record['url'])
+            if key in self.visited_urls:
+                continue
+            self.visited_urls.add(key)
+            item = NewsItem()
+            for field in ('title', 'time', 'site', 'url'):
+                item[field] = record.get(field)
+            self.news_queue.append((item, rank))
+        yield from self.process_news_queue()
+    
+    def listing_requests(self):
+        templates = self.settings.getlist('LISTING_URLS') or DEFAULT_LISTING_URLS[self.language]
+        today = datetime.now(CN_TZ).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        if self.end_date < today and not any('{date' in template for template in templates):
+            self.logger.warning(
+                "Listing range ends before today but no {date} template is configured in LISTING_URLS; "
+                "channel pages only reach back as far as their pagination (max_pages=%s)", self.max_pages)
+        num_days = (self.end_date - self.start_date).days + 1
+        for template in templates:
+            if '{date' not in template:
+                yield Request(template, callback=self.parse_listing)
+                continue
+            for offset in range(num_days):
+                date = self.start_date + timedelta(days=offset)
+                yield Request(template.format(date=date), callback=self.parse_listing)
+            
+    def replay_dead_letters(self, path):
+        # 先读完并归档整个文件：重放中再次失败的请求会写入新的死信文件，
+        # 已成功的请求不会在之后的重放中重复执行
+        with open(path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        archive = f"{path}.{datetime.now().strftime('%Y%m%d%H%M%S')}.replayed"
+        os.replace(path, archive)
+        self.logger.info("Archived %s to %s", path, archive)
+        self.logger.info("Replaying %d dead-lettered requests from %s", len(records), path)
+        for record in records:
+            meta = record.get('meta', {})
+            callbacks = {'parse_search': self.parse_search, 'parse_listing': self.parse_listing}
+            callback = callbacks.get(record.get('callback'))
+            if callback is None:
+                callback = self.parse_news
+                if 'item' in meta:
+                    meta['item'] = NewsItem(**meta['item'])
+                self.visited_urls.add(self._url_key(record['url']))
+            yield Request(record['url'],
+                          callback=callback,
+                          meta=meta,
+                          priority=record.get('priority', 0))
             
     def search(self, page, keyword):
         url = SEARCH_PATTERN.format(
@@ -105,29 +292,39 @@ class NewsSpider(scrapy.Spider):
     def parse_search(self, response):
         keyword = response.meta['keyword']
         page = response.meta['page']
-        self.logger.info(f"Searching for {keyword} Page {page}")
+        self.logger.debug("Searching for %s Page %s", keyword, page)
+        self.crawler.stats.inc_value('discovery/search_requests', spider=self)
         item = None
         try:
             data = json.loads(response.text)
             news_list = data.get('content', {}).get('results', [])
             if not news_list:
-                self.logger.warning(f"No news found for keyword '{keyword}' on page {page}.")
+                self.logger.warning("No news found for keyword '%s' on page %s.", keyword, page)
                 return
-            for news in news_list:
+            for index, news in enumerate(news_list):
                 url = news.get('url')
-                if not url or url in self.visited_urls:
+                if not url or self._url_key(url) in self.visited_urls:
                     continue
-                self.visited_urls.add(url)
+                self.visited_urls.add(self._url_key(url))
+                self.crawler.stats.inc_value('discovery/search_unique_urls', spider=self)
                 title = re.sub(r'<.*?>', '', news.get('title', ''))
                 item = NewsItem()
                 item['title'] = title.replace('&nbsp', ' ').replace(';', '').strip()
                 item['time'] = news.get('pubtime')
                 item['site'] = news.get('sitename')
                 item['url'] = url
-                self.news_queue.append(item)  # 将新闻加入队列
-                
-            # 如果队列大小超过一定数量，处理队列中的新闻
-            if len(self.news_queue) >= self.news_batch_size:
+                # 记录搜索排名，供新鲜度优先调度使用
+                rank = (page - 1) * len(news_list) + index
+                self.news_queue.append((item, rank))  # 将新闻加入队列
+                self.batch_count += 1
+            
+            # 仅元数据模式下输出新闻没有开销，每页都清空队列，避免关闭时丢失
+            if self.metadata_only:
+                yield from self.process_news_queue()
+            
+            # 如果收集的新闻数量超过一定数量，处理队列中的新闻并更换关键词
+            if self.batch_count >= self.news_batch_size:
+                self.batch_count = 0
                 yield from self.process_news_queue()
 
                 if item and item.get('title'):
@@ -139,14 +336,150 @@ class NewsSpider(scrapy.Spider):
                     yield from self.search(page, keyword)
                     
         except Exception as e:
-            self.logger.error(f"Error parsing search response: {e}")
+            self.logger.error("Error parsing search response: %s", e)
+
+    def parse_listing(self, response):
+        self.logger.debug("Listing %s", response.url)
+        stats = self.crawler.stats
+        stats.inc_value('discovery/listing_requests', spider=self)
+        start = self.start_date.strftime(DATE_PATTERN)
+        end = self.end_date.strftime(DATE_PATTERN)
+        
+        # 优先取 <a> 标签以获得标题，再用正则补充脚本/JSON 中的链接
+        links = {}
+        soup = BeautifulSoup(response.text, 'html.parser')
+        for a in soup.find_all('a', href=True):
+            url = response.urljoin(a['href'])
+            if ARTICLE_URL_PATTERN.search(url) and not links.get(url):
+                links[url] = a.get_text(strip=True)
+        for match in ARTICLE_URL_PATTERN.finditer(response.text):
+            links.setdefault(response.urljoin(match.group()), '')
+        
+        dates = []
+        for rank, (url, title) in enumerate(links.items()):
+            date = ARTICLE_URL_PATTERN.search(url).group(1)
+            dates.append(date)
+            key = self._url_key(url)
+            if not start <= date <= end or key in self.visited_urls:
+                continue
+            self.visited_urls.add(key)
+            stats.inc_value('discovery/listing_unique_urls', spider=self)
+            item = NewsItem()
+            item['title'] = title
+            # 列表页没有发布时间，由详情页解析时填入
+            item['time'] = None
+            item['site'] = None
+            item['url'] = url
+            self.news_queue.append((item, rank))
+        
+        # 列表页不会继续产生新的搜索请求，直接处理队列
+        yield from self.process_news_queue()
+        
+        # 列表按时间倒序，本页仍有不早于起始日期的新闻时才继续翻页
+        page = response.meta.get('listing_page', 1)
+        if dates and max(dates) >= start and page < self.max_pages:
+            next_link = soup.find('a', href=True, rel='next') or next(
+                (a for a in soup.find_all('a', href=True) if a.get_text(strip=True) in NEXT_PAGE_TEXTS), None)
+            if next_link is not None:
+                yield Request(response.urljoin(next_link['href']),
+                              callback=self.parse_listing,
+                              meta={'listing_page': page + 1})
 
     def process_news_queue(self):
-        while self.news_queue:
-            news_item = self.news_queue.pop(0)
+        if self.metadata_only:
+            # 仅元数据模式：直接输出搜索结果，不下载正文
+            while self.news_queue:
+                news_item, _ = self.news_queue.pop(0)
+                yield news_item
+            return
+        
+        if self.schedule == 'fifo':
+            while self.news_queue:
+                news_item, _ = self.news_queue.pop(0)
+                yield Request(news_item['url'], 
+                              callback=self.parse_news, 
+                              meta={'item': news_item})
+            return
+        
+        stats = self.crawler.stats
+        # 新鲜度优先：按发布时间由新到旧、搜索排名由高到低排序
+        # 发布时间未知（列表发现）时仅按链接日期估计排序，不参与 sla 检查
+        queue = []
+        for item, rank in self.news_queue:
+            age = self.news_age(item)
+            order_age = age if age is not None else self._url_date_age(item['url'])
+            queue.append((age, order_age, rank, item))
+        # 优先级只区分新鲜度桶和排名档，桶内顺序依赖 settings 中的 FIFO 调度队列
+        queue.sort(key=lambda x: (x[1] is None, x[1] or 0, x[2]))
+        self.news_queue = []
+        for age, order_age, rank, news_item in queue:
+            meta = {'item': news_item}
+            if self.sla and age is not None and age > self.sla:
+                if self.sla_policy == 'drop':
+                    stats.inc_value('freshness/sla_dropped', spider=self)
+                    continue
+                stats.inc_value('freshness/sla_deprioritized', spider=self)
+                priority = self.stale_priority
+                meta['sla_deprioritized'] = True
+            else:
+                priority = self._freshness_priority(order_age, rank)
+            # 出队时由 FreshnessMiddleware 按当时的时延再次检查 sla
             yield Request(news_item['url'], 
                           callback=self.parse_news, 
-                          meta={'item': news_item})
+                          meta=meta,
+                          priority=priority)
+    
+    def closed(self, reason):
+        stats = self.crawler.stats
+        for source in ('search', 'listing'):
+            num_requests = stats.get_value(f'discovery/{source}_requests', 0, spider=self)
+            num_urls = stats.get_value(f'discovery/{source}_unique_urls', 0, spider=self)
+            if num_requests:
+                stats.set_value(f'discovery/{source}_unique_urls_per_request',
+                                num_urls / num_requests, spider=self)
+        
+        if not self.ingest_latencies:
+            return
+        latencies = sorted(self.ingest_latencies)
+        for q in LATENCY_PERCENTILES:
+            stats.set_value(f'freshness/latency_p{q}', percentile(latencies, q), spider=self)
+        stats.set_value('freshness/latency_max', latencies[-1], spider=self)
+    
+    @property
+    def stale_priority(self):
+        # 过期新闻排在所有搜索请求之后
+        return -self.max_pages - 1
+    
+    def news_age(self, item):
+        try:
+            pubtime = datetime.strptime(item.get('time') or '', TIME_PATTERN).replace(tzinfo=CN_TZ)
+        except ValueError:
+            return None
+        return (datetime.now(CN_TZ) - pubtime).total_seconds()
+    
+    def _url_date_age(self, url):
+        match = ARTICLE_URL_PATTERN.search(url)
+        if not match:
+            return None
+        date = datetime.strptime(match.group(1), DATE_PATTERN).replace(tzinfo=CN_TZ)
+        return (datetime.now(CN_TZ) - date).total_seconds()
+    
+    def _freshness_priority(self, age, rank):
+        # 无法解析发布时间的新闻视为最旧
+        if age is None:
+            freshness = 0
+        else:
+            freshness = FRESHNESS_BUCKETS - min(int(age // FRESHNESS_BUCKET), FRESHNESS_BUCKETS)
+        tier = min(rank // RANK_TIER_SIZE, RANK_TIERS - 1)
+        return freshness * RANK_TIERS + (RANK_TIERS - 1 - tier)
+    
+    def _record_latency(self, item):
+        # 补抓正文的新闻早已发布，不计入时延统计
+        if self.fetch:
+            return
+        age = self.news_age(item)
+        if age is not None:
+            self.ingest_latencies.append(age)
             
     def _parse_news_cn(self, response):
         item = response.meta['item']
@@ -155,10 +488,15 @@ class NewsSpider(scrapy.Spider):
             detail = soup.find('div', id='detail')
             paragraphs = detail.find_all('p')
             item['content'] = '\n'.join([p.text.strip() for p in paragraphs])
-            self.logger.info(f"Collected {item['title']}")
+            if not item.get('title') and soup.title:
+                item['title'] = soup.title.get_text(strip=True)
+            if not item.get('time'):
+                item['time'] = self._extract_pubtime(soup, item['url'])
+            self.logger.debug("Collected %s", item['title'])
+            self._record_latency(item)
             yield item
         else:
-            self.logger.warning(f"Not a news page: {item['url']}")
+            self.logger.warning("Not a news page: %s", item['url'])
     
     def _parse_news_en(self, response):
         item = response.meta['item']
@@ -167,10 +505,34 @@ class NewsSpider(scrapy.Spider):
             detail = soup.find('div', id='detail')
             paragraphs = detail.find_all('p')
             item['content'] = '\n'.join([p.text.strip() for p in paragraphs])
-            self.logger.info(f"Collected {item['title']}")
+            if not item.get('title') and soup.title:
+                item['title'] = soup.title.get_text(strip=True)
+            if not item.get('time'):
+                item['time'] = self._extract_pubtime(soup, item['url'])
+            self.logger.debug("Collected %s", item['title'])
+            self._record_latency(item)
             yield item
         else:
-            self.logger.warning(f"Not a news page: {item['url']}")
+            self.logger.warning("Not a news page: %s", item['url'])
+            
+    def _extract_pubtime(self, soup, url):
+        # 优先取页头的时间；正文中的日期只有与链接日期一致时才采用
+        header = soup.find(class_='header-time')
+        match = header and PUBTIME_PATTERN.search(header.get_text(' '))
+        if not match:
+            url_match = ARTICLE_URL_PATTERN.search(url)
+            for candidate in PUBTIME_PATTERN.finditer(soup.get_text(' ')):
+                year, month, day = candidate.group(1, 2, 3)
+                if url_match and f'{year}{int(month):02d}{int(day):02d}' == url_match.group(1):
+                    match = candidate
+                    break
+        if not match:
+            return None
+        year, month, day, hour, minute, second = (int(g or 0) for g in match.groups())
+        try:
+            return datetime(year, month, day, hour, minute, second).strftime(TIME_PATTERN)
+        except ValueError:
+            return None
             
     def _gen_keyword_cn(self, title: str):
         return random.choice(jieba.lcut(title))
@@ -178,6 +540,12 @@ class NewsSpider(scrapy.Spider):
     def _gen_keyword_en(self, title: str):
         return random.choice(title.split(' '))
 
+    @staticmethod
+    def _url_key(url):
+        # 同一新闻可能以 http/https 或不同栏目路径出现，按日期和 id 去重
+        match = ARTICLE_URL_PATTERN.search(url)
+        return match.group(1, 2) if match else url
+
     @staticmethod
     def is_news(soup):
         detail = soup.find('div', id='detail')
@@ -0,0 +1,245 @@
+# File: xinhua-crawler/news_crawler/utils/boilerplate.py
+
+import argparse
+import hashlib
+import os
+import struct
+from array import array
+from typing import Iterable, Iterator, Pattern
+
+from .corpus_io import iter_shard, write_shard
+from .tokenization import (
+    SENTENCE_ENDINGS_CN,
+    SENTENCE_ENDINGS_EN,
+    split_sentences_cn,
+    split_sentences_en,
+)
+
+# Default sketch size: 4 rows x 2^20 counters x 4 bytes = 16 MiB
+DEFAULT_WIDTH = 1 << 20
+DEFAULT_DEPTH = 4
+DEFAULT_THRESHOLD = 20
+COUNTER_MAX = 0xFFFFFFFF
+SKETCH_HEADER = struct.Struct('<II')
+
+class SentenceSketch:
+    """
+    Count-Min sketch of sentence document frequencies with a fixed memory footprint.
+
+    Counts are never underestimated; conservative update keeps overestimation
+    from hash collisions low. Sketches of the same shape can be saved and merged,
+    so shards may be counted independently (see the count and filter commands).
+
+    Args:
+        width (int): Number of counters per row.
+        depth (int): Number of rows (independent hash functions).
+    """
+    def __init__(self, width: int = DEFAULT_WIDTH, depth: int = DEFAULT_DEPTH) -> None:
+        self.width = width
+        self.depth = depth
+        self.rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+
+    def _indices(self, sentence: str) -> list[int]:
+        digest = hashlib.blake2b(sentence.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, sentence: str) -> None:
+        indices = self._indices(sentence)
+        target = min(self.rows[i][j] for i, j in enumerate(indices)) + 1
+        if target > COUNTER_MAX:
+            return
+        for row, j in zip(self.rows, indices):
+            if row[j] < target:
+                row[j] = target
+
+    def count(self, sentence: str) -> int:
+        return min(self.rows[i][j] for i, j in enumerate(self._indices(sentence)))
+
+    def merge(self, other: 'SentenceSketch') -> None:
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError('Cannot merge sketches of different shapes')
+        for row, other_row in zip(self.rows, other.rows):
+            for j, value in enumerate(other_row):
+                if value:
+                    row[j] = min(row[j] + value, COUNTER_MAX)
+
+    def save(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            f.write(SKETCH_HEADER.pack(self.width, self.depth))
+            for row in self.rows:
+                row.tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> 'SentenceSketch':
+        with open(path, 'rb') as f:
+            width, depth = SKETCH_HEADER.unpack(f.read(SKETCH_HEADER.size))
+            sketch = cls.__new__(cls)
+            sketch.width, sketch.depth = width, depth
+            sketch.rows = []
+            for _ in range(depth):
+                row = array('I')
+                row.fromfile(f, width)
+                sketch.rows.append(row)
+        return sketch
+
+def _split_sentences(text: str, language: str) -> list[str]:
+    if language == 'cn':
+        return split_sentences_cn(text)
+    elif language == 'en':
+        return split_sentences_en(text)
+    raise ValueError(f'Unsupported language: {language}')
+
+def _iter_segments(text: str, pattern: Pattern) -> Iterator[tuple[str, str]]:
+    # Same boundaries as split_sentences_*, but keeps the sentence endings
+    start = 0
+    for match in pattern.finditer(text):
+        yield text[start:match.start()], match.group()
+        start = match.end()
+    yield text[start:], ''
+
+def count_sentences(texts: Iterable[str], sketch: SentenceSketch, language: str = 'cn') -> int:
+    """
+    Count each distinct sentence once per document into the sketch.
+
+    Args:
+        texts (Iterable[str]): Document contents.
+        sketch (SentenceSketch): Sketch to update in place.
+        language (str): 'cn' or 'en'.
+
+    Returns:
+        int: Number of documents counted.
+    """
+    num_docs = 0
+    for text in texts:
+        for sentence in set(_split_sentences(text, language)):
+            sketch.add(sentence)
+        num_docs += 1
+    return num_docs
+
+def strip_boilerplate(text: str, sketch: SentenceSketch, threshold: int = DEFAULT_THRESHOLD,
+                      language: str = 'cn') -> str:
+    """
+    Remove sentences whose document frequency reaches the threshold.
+
+    Args:
+        text (str): The text to filter.
+        sketch (SentenceSketch): Sketch filled by count_sentences.
+        threshold (int): Minimum document frequency for a sentence to be boilerplate.
+        language (str): 'cn' or 'en'.
+
+    Returns:
+        str: The text without boilerplate sentences.
+    """
+    if language == 'cn':
+        pattern, sep = SENTENCE_ENDINGS_CN, ''
+    elif language == 'en':
+        pattern, sep = SENTENCE_ENDINGS_EN, ' '
+    else:
+        raise ValueError(f'Unsupported language: {language}')
+
+    kept = []
+    for sentence, ending in _iter_segments(text, pattern):
+        sentence = sentence.strip()
+        if sentence and sketch.count(sentence) < threshold:
+            kept.append(sentence + ending)
+    return sep.join(kept)
+
+def count_corpus(paths: list[str], sketch: SentenceSketch, language: str = 'cn') -> SentenceSketch:
+    """
+    Counting pass: stream the shards into the sketch.
+
+    Args:
+        paths (list[str]): Input shards.
+        sketch (SentenceSketch): Sketch to update in place.
+        language (str): 'cn' or 'en'.
+
+    Returns:
+        SentenceSketch: The updated sketch.
+    """
+    for path in paths:
+        count_sentences((item.get('content', '') for item in iter_shard(path)), sketch, language)
+    return sketch
+
+def filter_corpus(paths: list[str], output_dir: str, sketch: SentenceSketch,
+                  threshold: int = DEFAULT_THRESHOLD, language: str = 'cn') -> None:
+    """
+    Filter pass: stream each shard to output_dir with boilerplate sentences removed.
+
+    Args:
+        paths (list[str]): Input shards.
+        output_dir (str): Directory receiving the filtered shards (same file names).
+        sketch (SentenceSketch): Sketch filled over the whole corpus.
+        threshold (int): Minimum document frequency for a sentence to be boilerplate.
+        language (str): 'cn' or 'en'.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for path in paths:
+        output_path = os.path.join(output_dir, os.path.basename(path))
+        if os.path.abspath(output_path) == os.path.abspath(path):
+            raise ValueError(f'Output would overwrite input shard: {path}')
+
+        def filtered(path=path):
+            for item in iter_shard(path):
+                content = strip_boilerplate(item.get('content', ''), sketch, threshold, language)
+                if content:
+                    item['content'] = content
+                    yield item
+        write_shard(output_path, filtered())
+
+def dedup_corpus(paths: list[str], output_dir: str, threshold: int = DEFAULT_THRESHOLD,
+                 language: str = 'cn', width: int = DEFAULT_WIDTH, depth: int = DEFAULT_DEPTH) -> SentenceSketch:
+    """
+    Strip corpus-wide boilerplate from sharded input: one counting pass, one filter pass.
+
+    Args:
+        paths (list[str]): Input shards.
+        output_dir (str): Directory receiving the filtered shards (same file names).
+        threshold (int): Minimum document frequency for a sentence to be boilerplate.
+        language (str): 'cn' or 'en'.
+        width (int): Sketch width.
+        depth (int): Sketch depth.
+
+    Returns:
+        SentenceSketch: The filled sketch.
+    """
+    sketch = count_corpus(paths, SentenceSketch(width, depth), language)
+    filter_corpus(paths, output_dir, sketch, threshold, language)
+    return sketch
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Remove corpus-wide boilerplate sentences. '
+                    'Shards may be counted separately with "count" and merged by "filter".')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='count and filter in one go')
+    count = commands.add_parser('count', help='count shards into a sketch file')
+    filter_ = commands.add_parser('filter', help='merge sketch files and filter shards')
+    for command in (run, count, filter_):
+        command.add_argument('paths', nargs='+', help='input shards (.json or .jsonl)')
+        command.add_argument('-l', '--language', default='cn', choices=['cn', 'en'])
+    for command in (run, count):
+        command.add_argument('--width', type=int, default=DEFAULT_WIDTH)
+        command.add_argument('--depth', type=int, default=DEFAULT_DEPTH)
+    for command in (run, filter_):
+        command.add_argument('-o', '--output-dir', required=True)
+        command.add_argument('-t', '--threshold', type=int, default=DEFAULT_THRESHOLD)
+    count.add_argument('-s', '--sketch', required=True, help='output sketch file')
+    filter_.add_argument('-s', '--sketch', required=True, action='append',
+                         help='sketch file from "count"; repeat to merge several')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        dedup_corpus(args.paths, args.output_dir, args.threshold, args.language, args.width, args.depth)
+    elif args.command == 'count':
+        count_corpus(args.paths, SentenceSketch(args.width, args.depth), args.language).save(args.sketch)
+    else:
+        sketch = SentenceSketch.load(args.sketch[0])
+        for path in args.sketch[1:]:
+            sketch.merge(SentenceSketch.load(path))
+        filter_corpus(args.paths, args.output_dir, sketch, args.threshold, args.language)
+
+if __name__ == '__main__':
+    main()
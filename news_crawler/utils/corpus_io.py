@@ -0,0 +1,77 @@
+# File: xinhua-crawler/news_crawler/utils/corpus_io.py
+
+import json
+from typing import Iterable, Iterator, TextIO
+
+CHUNK_SIZE = 1 << 16
+JSON_SEPARATORS = ' \t\r\n,'
+
+def iter_shard(path: str) -> Iterator[dict]:
+    """
+    Stream the news items of a shard: a JSON list (data.json) or JSON Lines.
+
+    JSON lists are parsed incrementally, so memory use is bounded by the largest item.
+
+    Args:
+        path (str): Path to the shard.
+
+    Returns:
+        Iterator[dict]: News items.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_list(f)
+
+def _iter_json_list(f: TextIO) -> Iterator[dict]:
+    decoder = json.JSONDecoder()
+    buf = f.read(CHUNK_SIZE).lstrip()
+    if not buf.startswith('['):
+        raise ValueError(f'Expected a JSON list in {f.name}')
+    pos = 1
+    while True:
+        # Skip separators, reading more input as needed
+        while True:
+            while pos < len(buf) and buf[pos] in JSON_SEPARATORS:
+                pos += 1
+            if pos < len(buf):
+                break
+            buf, pos = f.read(CHUNK_SIZE), 0
+            if not buf:
+                raise ValueError(f'Unterminated JSON list in {f.name}')
+        if buf[pos] == ']':
+            return
+        try:
+            item, pos = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Item spans the chunk boundary
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                raise
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield item
+        if pos > CHUNK_SIZE:
+            buf, pos = buf[pos:], 0
+
+def write_shard(path: str, items: Iterable[dict]) -> None:
+    """
+    Stream news items to a shard, as a JSON list (same layout as data.json) or JSON Lines.
+
+    Args:
+        path (str): Path to the shard; '.jsonl' selects JSON Lines.
+        items (Iterable[dict]): News items.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for item in items:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+            return
+        f.write('[')
+        for i, item in enumerate(items):
+            f.write(',\n    ' if i else '\n    ')
+            f.write(json.dumps(item, ensure_ascii=False, indent=4).replace('\n', '\n    '))
+        f.write('\n]')
@@ -0,0 +1,110 @@
+# File: xinhua-crawler/news_crawler/utils/event_analysis.py
+
+import argparse
+import json
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Iterable, Iterator
+
+DEFAULT_BUCKET = 60
+TIME_PATTERN = '%Y-%m-%d %H:%M:%S'
+
+def iter_events(path: str) -> Iterator[dict]:
+    """
+    Iterate over the records of an event log written by EventLogExtension.
+
+    Args:
+        path (str): Path to the event log.
+
+    Returns:
+        Iterator[dict]: Event records.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def error_kind(event: dict) -> str | None:
+    """
+    Classify an event as a failure, shared by the timeline and the error breakdown.
+
+    Args:
+        event (dict): Event record.
+
+    Returns:
+        str | None: 'http_<status>', 'error:<type>', 'drop:<reason>' or 'dead_letter:<reason>',
+            or None if the event is not a failure.
+    """
+    if event['e'] == 'response' and event.get('status', 200) >= 400:
+        return f"http_{event['status']}"
+    elif event['e'] == 'error':
+        return f"error:{event.get('error')}"
+    elif event['e'] in ('drop', 'dead_letter'):
+        return f"{event['e']}:{event.get('reason')}"
+    return None
+
+def throughput_timeline(events: Iterable[dict], bucket: int = DEFAULT_BUCKET) -> list[tuple[float, Counter]]:
+    """
+    Count events per type in fixed time buckets, scaling sampled events by their weight.
+    Failures as classified by error_kind are also counted under 'failures'.
+
+    Args:
+        events (Iterable[dict]): Event records.
+        bucket (int): Bucket width in seconds.
+
+    Returns:
+        list[tuple[float, Counter]]: (bucket start timestamp, counts per event type), in time order.
+    """
+    buckets = defaultdict(Counter)
+    for event in events:
+        start = event['t'] // bucket * bucket
+        weight = event.get('w', 1)
+        buckets[start][event['e']] += weight
+        if error_kind(event):
+            buckets[start]['failures'] += weight
+    return sorted(buckets.items())
+
+def error_breakdown(events: Iterable[dict]) -> Counter:
+    """
+    Count failures by kind: HTTP error statuses, spider errors, dropped items and dead letters.
+
+    Args:
+        events (Iterable[dict]): Event records.
+
+    Returns:
+        Counter: Weighted counts keyed by 'http_<status>', 'error:<type>', 'drop:<reason>'
+            or 'dead_letter:<reason>'.
+    """
+    errors = Counter()
+    for event in events:
+        kind = error_kind(event)
+        if kind:
+            errors[kind] += event.get('w', 1)
+    return errors
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Summarize a crawl event log.')
+    parser.add_argument('path', help='event log (.jsonl)')
+    parser.add_argument('-b', '--bucket', type=int, default=DEFAULT_BUCKET, help='bucket width in seconds')
+    args = parser.parse_args()
+
+    events = list(iter_events(args.path))
+    if not events:
+        print('No events.')
+        return
+
+    per_minute = 60 / args.bucket
+    print(f"{'time':<20}{'responses':>12}{'items':>10}{'errors':>10}{'items/min':>12}")
+    for start, counts in throughput_timeline(events, args.bucket):
+        print(f"{datetime.fromtimestamp(start).strftime(TIME_PATTERN):<20}"
+              f"{counts['response']:>12.0f}{counts['item']:>10.0f}{counts['failures']:>10.0f}"
+              f"{counts['item'] * per_minute:>12.1f}")
+
+    errors = error_breakdown(events)
+    if errors:
+        print('\nErrors:')
+        for kind, count in errors.most_common():
+            print(f'  {kind:<40}{count:>10.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+# File: xinhua-crawler/news_crawler/utils/token_cache.py
+
+import argparse
+import hashlib
+import json
+import sqlite3
+
+import jieba
+
+from .corpus_io import iter_shard, write_shard
+from .tokenization import TOKENIZER_VERSION, tokenize_cn, tokenize_en
+
+DEFAULT_MAX_BYTES = 1 << 30
+# Evict down to this fraction of max_bytes so eviction does not run on every insert
+EVICT_TARGET = 0.9
+COMMIT_INTERVAL = 1000
+
+class TokenizationCache:
+    """
+    On-disk cache of tokenized documents keyed by a hash of the text, TOKENIZER_VERSION
+    and tokenizer settings.
+
+    Entries are evicted least-recently-used first once the stored tokens exceed max_bytes.
+
+    Args:
+        path (str): Path to the SQLite cache file.
+        max_bytes (int): Maximum total size of cached tokens in bytes.
+    """
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS tokens ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used INTEGER NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS tokens_used ON tokens (used)')
+        self.size, clock = self.conn.execute(
+            'SELECT COALESCE(SUM(size), 0), COALESCE(MAX(used), 0) FROM tokens'
+        ).fetchone()
+        self._clock = clock
+
+    def __enter__(self) -> 'TokenizationCache':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def tokenize_cn(self, text: str, min_len: int = 5, only_cnchr: bool = False) -> list[list[str]]:
+        """
+        Cached tokenize_cn.
+
+        Args:
+            text (str): The cleaned Chinese text to tokenize.
+            min_len (int): Minimum number of tokens required for a sentence.
+            only_cnchr (bool): Keep only tokens made of Chinese characters.
+
+        Returns:
+            List[List[str]]: Tokenized sentences.
+        """
+        key = self._key(text, 'cn', TOKENIZER_VERSION, jieba.__version__, min_len, only_cnchr)
+        return self._get_or_compute(key, lambda: tokenize_cn(text, min_len, only_cnchr))
+
+    def tokenize_en(self, text: str, min_len: int = 5) -> list[list[str]]:
+        """
+        Cached tokenize_en.
+
+        Args:
+            text (str): The cleaned English text to tokenize.
+            min_len (int): Minimum number of tokens required for a sentence.
+
+        Returns:
+            List[List[str]]: Tokenized sentences.
+        """
+        key = self._key(text, 'en', TOKENIZER_VERSION, min_len)
+        return self._get_or_compute(key, lambda: tokenize_en(text, min_len))
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    @staticmethod
+    def _key(text: str, *settings) -> str:
+        prefix = '\0'.join(str(s) for s in settings)
+        return hashlib.blake2b(f'{prefix}\0{text}'.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _get_or_compute(self, key: str, compute) -> list[list[str]]:
+        self._clock += 1
+        row = self.conn.execute('SELECT value FROM tokens WHERE key = ?', (key,)).fetchone()
+        if row is not None:
+            self.hits += 1
+            self.conn.execute('UPDATE tokens SET used = ? WHERE key = ?', (self._clock, key))
+            self._maybe_commit()
+            return json.loads(row[0])
+
+        self.misses += 1
+        tokens = compute()
+        value = json.dumps(tokens, ensure_ascii=False, separators=(',', ':'))
+        size = len(value.encode('utf-8'))
+        self.conn.execute('INSERT INTO tokens VALUES (?, ?, ?, ?)', (key, value, size, self._clock))
+        self.size += size
+        if self.size > self.max_bytes:
+            self._evict()
+        self._maybe_commit()
+        return tokens
+
+    def _evict(self) -> None:
+        target = self.max_bytes * EVICT_TARGET
+        rows = self.conn.execute('SELECT key, size FROM tokens ORDER BY used')
+        evicted = []
+        for key, size in rows:
+            if self.size <= target:
+                break
+            evicted.append((key,))
+            self.size -= size
+        self.conn.executemany('DELETE FROM tokens WHERE key = ?', evicted)
+
+    def _maybe_commit(self) -> None:
+        self._pending += 1
+        if self._pending >= COMMIT_INTERVAL:
+            self.conn.commit()
+            self._pending = 0
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Tokenize a corpus, reusing cached results.')
+    parser.add_argument('paths', nargs='+', help='input shards (.json or .jsonl)')
+    parser.add_argument('-o', '--output', required=True, help='output file (.json or .jsonl)')
+    parser.add_argument('-c', '--cache', default='token_cache.sqlite')
+    parser.add_argument('-l', '--language', default='cn', choices=['cn', 'en'])
+    parser.add_argument('--min-len', type=int, default=5)
+    parser.add_argument('--only-cnchr', action='store_true')
+    parser.add_argument('--max-bytes', type=int, default=DEFAULT_MAX_BYTES)
+    args = parser.parse_args()
+
+    with TokenizationCache(args.cache, args.max_bytes) as cache:
+        def tokenized():
+            for path in args.paths:
+                for item in iter_shard(path):
+                    content = item.get('content', '')
+                    if args.language == 'cn':
+                        item['tokens'] = cache.tokenize_cn(content, args.min_len, args.only_cnchr)
+                    else:
+                        item['tokens'] = cache.tokenize_en(content, args.min_len)
+                    yield item
+        write_shard(args.output, tokenized())
+        print(f'Cache hits: {cache.hits}, misses: {cache.misses}, hit rate: {cache.hit_rate:.1%}')
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,9 @@ import re
 import regex
 import jieba
 
+# Bump whenever tokenize_cn/tokenize_en or their patterns change, so cached tokens are invalidated
+TOKENIZER_VERSION = 1
+
 # Precompile regex patterns for performance
 CN_PUNCTUATION_PATTERN = regex.compile(r'\p{P}')
 EN_PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')